@@ -1,13 +1,23 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
 import time
 import os
 import json
+import hashlib
 import re
 import logging
 import sys
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from html import unescape
 from datetime import datetime, timezone, timedelta
-from urllib.parse import quote_plus
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -35,12 +45,44 @@ PRODUCT_URL = os.getenv("PRODUCT_URL", "")
 
 TOKEN = os.getenv("TELEGRAM_TOKEN")
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+TELEGRAM_URL = f"https://api.telegram.org/bot{TOKEN}/sendMessage"
 CHECK_INTERVAL = int(os.getenv("INTERVAL", 300))
 DAILY_REPORT_HOUR = int(os.getenv("DAILY_REPORT_HOUR", 11))  # Hour in IST (24-hour format)
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", 16))  # Max concurrent product fetches
+DNS_CACHE_TTL = int(os.getenv("DNS_CACHE_TTL", 600))  # Seconds to cache DNS lookups, 0 to disable
 
 # Default out-of-stock keywords if not specified per product
 DEFAULT_OUT_OF_STOCK_KEYWORDS = ["Coming Soon", "Out of Stock", "Sold Out", "Notify Me", "Currently Unavailable"]
 
+# Button/link labels that indicate the product can be purchased
+ADD_TO_CART_LABELS = {"add to cart", "buy now", "add to bag"}
+
+# Only these tags are parsed when looking for an add-to-cart button
+ADD_TO_CART_STRAINER = SoupStrainer(["button", "input", "a"])
+
+# Patterns for pulling visible text out of raw HTML without building a DOM
+# An unclosed comment or script/style/template runs to the end of the page, as it does for
+# lxml, so one unclosed opener ends the scan instead of each opener rescanning the rest
+_RE_NON_TEXT = re.compile(
+    rb'<!--.*?(?:-->|\Z)|<(script|style|template)\b.*?(?:</\1\s*>|\Z)',
+    re.IGNORECASE | re.DOTALL,
+)
+# A tag starts with '<' plus a letter, '/', '!' or '?' (so "<2 days" stays text), and
+# quoted attribute values may contain '>'
+_RE_TAG = re.compile(rb'''<[A-Za-z/!?](?:"[^"]*(?:"|\Z)|'[^']*(?:'|\Z)|[^'">])*+(?:>|\Z)''')
+_RE_WHITESPACE = re.compile(r'\s+')
+
+# Shopify product JSON patterns, compiled once and matched against raw response bytes
+_RE_AVAILABLE = re.compile(rb'"available"\s*:\s*(true|false)', re.IGNORECASE)
+_RE_AVAIL_FOR_SALE = re.compile(rb'"availableForSale"\s*:\s*(true|false)', re.IGNORECASE)
+_RE_AVAILABLE_TRUE = re.compile(rb'"available"\s*:\s*true', re.IGNORECASE)
+
+# Chunk size used when streaming product pages
+STREAM_CHUNK_SIZE = 16384
+# After an early match, read up to this many more bytes so small pages finish and keep their
+# pooled connection; larger remainders are abandoned, which closes the connection instead
+STREAM_DRAIN_LIMIT = 131072
+
 HEADERS = {
     "User-Agent": (
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -48,128 +90,259 @@ HEADERS = {
         "Chrome/120.0.0.0 Safari/537.36"
     ),
     "Accept-Language": "en-US,en;q=0.9",
+    "Connection": "keep-alive",
 }
 
+# DNS cache used by the session's connections: (host, port) -> (resolved_at, ip_addresses)
+_DNS_CACHE: dict[tuple[str, int], tuple[float, list[str]]] = {}
 
-def get_products() -> list:
+
+def resolve_host(host: str, port: int) -> list[str]:
     """
-    Get list of products to monitor.
+    Resolve a host to its IP addresses, reusing lookups younger than DNS_CACHE_TTL.
+    """
+    key = (host, port)
+    now = time.monotonic()
+    cached = _DNS_CACHE.get(key)
+    if cached and now - cached[0] < DNS_CACHE_TTL:
+        return cached[1]
+    infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    addresses = list(dict.fromkeys(info[4][0] for info in infos))
+    _DNS_CACHE[key] = (now, addresses)
+    return addresses
+
+
+class CachedDNSConnectionMixin:
+    """
+    Connect to the cached addresses of a host instead of resolving it on every new connection.
+    If none of them accept the connection the host's entry is dropped, so the retry resolves again.
+    """
+
+    def _new_conn(self):
+        host = self._dns_host
+        try:
+            addresses = resolve_host(host, self.port)
+        except OSError:
+            # Let urllib3 resolve again and raise its usual error
+            return super()._new_conn()
+        
+        last_error = None
+        for address in addresses:
+            # Only the TCP connect uses the IP; TLS SNI and the Host header still use the hostname
+            self._dns_host = address
+            try:
+                return super()._new_conn()
+            except (NewConnectionError, ConnectTimeoutError) as e:
+                last_error = e
+            finally:
+                self._dns_host = host
+        
+        _DNS_CACHE.pop((host, self.port), None)
+        raise last_error
+
+
+class CachedDNSHTTPConnection(CachedDNSConnectionMixin, HTTPConnection):
+    pass
+
+
+class CachedDNSHTTPSConnection(CachedDNSConnectionMixin, HTTPSConnection):
+    pass
+
+
+class CachedDNSHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = CachedDNSHTTPConnection
+
+
+class CachedDNSHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = CachedDNSHTTPSConnection
+
+
+class CachedDNSAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connection pools resolve hosts through resolve_host().
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CachedDNSHTTPConnectionPool,
+            "https": CachedDNSHTTPSConnectionPool,
+        }
+
+
+# Shared HTTP session so connections (TCP + TLS) are reused across checks
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+_adapter_cls = CachedDNSAdapter if DNS_CACHE_TTL > 0 else HTTPAdapter
+_adapter = _adapter_cls(
+    pool_connections=16,
+    # One connection per worker thread, so concurrent fetches to one host are never discarded
+    pool_maxsize=MAX_WORKERS,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504]),
+)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
+
+@lru_cache(maxsize=None)
+def get_keyword_pattern(keywords: tuple) -> re.Pattern | None:
+    """
+    Build a single case-insensitive regex matching any of the given keywords.
+    Cached per keyword set so products sharing keywords share one pattern.
+    Returns None when there are no keywords to match.
+    """
+    if not keywords:
+        return None
+    return re.compile("|".join(map(re.escape, keywords)), re.IGNORECASE)
+
+
+@dataclass(slots=True)
+class Product:
+    """
+    A monitored product, normalized once at startup.
+    
+    Holds the precompiled out-of-stock pattern plus the HTTP state from the
+    last check (validators for conditional GETs, and the hash of the last
+    fully parsed body together with the verdict parsed from it).
+    """
+    name: str
+    url: str
+    oos_pattern: re.Pattern | None
+    etag: str = ""
+    last_modified: str = ""
+    body_hash: bytes = b""
+    body_result: bool = False
+    last_result: bool = False
+
+
+def make_product(config: dict) -> Product:
+    """
+    Build a Product from a config dict with 'name', 'url', and optional 'out_of_stock_keywords'.
+    """
+    keywords = config.get("out_of_stock_keywords")
+    if keywords is None:
+        keywords = DEFAULT_OUT_OF_STOCK_KEYWORDS
+    return Product(
+        name=config.get("name", "Unknown"),
+        url=config.get("url", ""),
+        oos_pattern=get_keyword_pattern(tuple(keywords)),
+    )
+
+
+def _load_products() -> list[Product]:
+    """
+    Parse the list of products to monitor from the environment.
     Supports both multi-product JSON config and single URL fallback.
     """
     if PRODUCTS_JSON:
         try:
             products = json.loads(PRODUCTS_JSON)
             if isinstance(products, list) and len(products) > 0:
-                return products
+                return [make_product(p) for p in products]
         except json.JSONDecodeError as e:
             logger.error(f"Error parsing PRODUCTS JSON: {e}")
     
     # Fallback to single product URL
     if PRODUCT_URL:
-        return [{
+        return [make_product({
             "name": "Product",
             "url": PRODUCT_URL,
             "out_of_stock_keywords": DEFAULT_OUT_OF_STOCK_KEYWORDS
-        }]
+        })]
     
     logger.error("No products configured. Set PRODUCTS or PRODUCT_URL environment variable.")
     return []
 
 
+# Config is fixed for the lifetime of the process, so parse it once at startup
+_PRODUCTS_CACHE = _load_products()
+
+
+def get_products() -> list[Product]:
+    """
+    Get list of products to monitor.
+    """
+    return _PRODUCTS_CACHE
+
+
 def send_telegram_message(text: str):
     if not TOKEN or not CHAT_ID:
         logger.warning("Telegram TOKEN or CHAT_ID not set, skipping notification.")
         return
-    url = (
-        f"https://api.telegram.org/bot{TOKEN}/sendMessage?"
-        f"chat_id={CHAT_ID}&text={quote_plus(text)}"
-    )
     try:
-        r = requests.get(url, timeout=10)
+        r = SESSION.post(TELEGRAM_URL, json={"chat_id": CHAT_ID, "text": text}, timeout=10)
         r.raise_for_status()
         logger.info("Telegram notification sent successfully")
     except Exception as e:
         logger.error(f"Error sending Telegram message: {e}")
 
 
-def check_shopify_json_availability(html: str) -> tuple[bool, bool]:
+def check_shopify_json_availability(html: bytes) -> tuple[bool, bool]:
     """
     Check Shopify product JSON for availability status.
     
+    Works on the raw response bytes so no decoding is needed.
+    
     Returns:
         Tuple of (is_shopify_site, is_available)
     """
     # Look for Shopify product JSON data in various formats
     patterns = [
         # Pattern 1: mainProduct JSON (like in FastBundle)
-        r'"available"\s*:\s*(true|false)',
+        _RE_AVAILABLE,
         # Pattern 2: Product JSON in script tags
-        r'"availableForSale"\s*:\s*(true|false)',
+        _RE_AVAIL_FOR_SALE,
     ]
     
     for pattern in patterns:
-        matches = re.findall(pattern, html, re.IGNORECASE)
+        matches = pattern.findall(html)
         if matches:
             # If we find "available":true anywhere, consider it in stock
             # We check if ANY variant is available
-            if 'true' in [m.lower() for m in matches]:
+            if b'true' in [m.lower() for m in matches]:
                 return (True, True)
             # If all are false, it's out of stock
             return (True, False)
     
-    # Also check for Shopify-specific variant availability
-    # Look for pattern like "variants":[{"available":false}]
-    variant_pattern = r'"variants"\s*:\s*\[(.*?)\]'
-    variant_match = re.search(variant_pattern, html, re.DOTALL)
-    if variant_match:
-        variant_content = variant_match.group(1)
-        # Check if any variant is available
-        if '"available":true' in variant_content or '"available": true' in variant_content:
-            return (True, True)
-        if '"available":false' in variant_content or '"available": false' in variant_content:
-            return (True, False)
-    
+    # Variant data like "variants":[{"available":false}] is already covered by
+    # Pattern 1, so no separate scan of the variants array is needed
     return (False, False)
 
 
-def is_in_stock(html: bytes, out_of_stock_keywords: list = None) -> bool:
+def extract_text(html: bytes) -> str:
     """
-    Check if product is in stock based on page content.
+    Get the visible text of a page by stripping tags, scripts and styles.
     
-    Supports:
-    - Shopify stores (checks JSON product data)
-    - Generic sites (checks for keywords and add-to-cart buttons)
+    Much cheaper than building a soup just to call get_text().
+    """
+    text = _RE_TAG.sub(b" ", _RE_NON_TEXT.sub(b" ", html))
+    text = unescape(text.decode('utf-8', errors='ignore'))
+    return _RE_WHITESPACE.sub(" ", text).strip()
+
+
+def check_generic_availability(html: bytes, oos_pattern: re.Pattern | None) -> bool:
+    """
+    Check a non-Shopify page for out-of-stock keywords and an add-to-cart button.
     
     Args:
         html: Raw HTML content of the product page
-        out_of_stock_keywords: List of keywords that indicate out-of-stock status
+        oos_pattern: Compiled pattern of out-of-stock keywords, or None to skip the keyword check
     
     Returns:
         True if product appears to be in stock, False otherwise
     """
-    if out_of_stock_keywords is None:
-        out_of_stock_keywords = DEFAULT_OUT_OF_STOCK_KEYWORDS
-    
-    html_str = html.decode('utf-8', errors='ignore')
-    soup = BeautifulSoup(html, "html.parser")
-    
-    # Method 1: Check Shopify JSON data (most reliable for Shopify sites)
-    is_shopify, is_available = check_shopify_json_availability(html_str)
-    if is_shopify:
-        logger.debug(f"Shopify detected - Product available: {is_available}")
-        return is_available
-    
     # Method 2: Check for out-of-stock keywords in page text
-    full_text = soup.get_text(separator=" ", strip=True)
-    for keyword in out_of_stock_keywords:
-        if keyword.lower() in full_text.lower():
-            logger.debug(f"Found out-of-stock keyword: '{keyword}'")
-            return False
+    full_text = extract_text(html)
+    match = oos_pattern and oos_pattern.search(full_text)
+    if match:
+        logger.debug(f"Found out-of-stock keyword: '{match.group(0)}'")
+        return False
 
     # Method 3: Look for add-to-cart button (fallback)
+    soup = BeautifulSoup(html, "lxml", parse_only=ADD_TO_CART_STRAINER)
     add_to_cart = soup.find(
         lambda tag: tag.name in ["button", "input", "a"]
-        and tag.get_text(strip=True).lower() in ["add to cart", "buy now", "add to bag"]
+        and tag.get_text(strip=True).lower() in ADD_TO_CART_LABELS
     )
     
     if add_to_cart:
@@ -184,58 +357,135 @@ def is_in_stock(html: bytes, out_of_stock_keywords: list = None) -> bool:
     return False
 
 
-def check_stock(product: dict) -> bool:
+def is_in_stock(html: bytes, oos_pattern: re.Pattern | None) -> bool:
+    """
+    Check if product is in stock based on page content.
+    
+    Supports:
+    - Shopify stores (checks JSON product data)
+    - Generic sites (checks for keywords and add-to-cart buttons)
+    
+    Args:
+        html: Raw HTML content of the product page
+        oos_pattern: Compiled pattern of out-of-stock keywords (see get_keyword_pattern)
+    
+    Returns:
+        True if product appears to be in stock, False otherwise
+    """
+    # Method 1: Check Shopify JSON data (most reliable for Shopify sites)
+    # Shopify pages return here, so no text extraction or parsing runs for them
+    is_shopify, is_available = check_shopify_json_availability(html)
+    if is_shopify:
+        logger.debug(f"Shopify detected - Product available: {is_available}")
+        return is_available
+    
+    return check_generic_availability(html, oos_pattern)
+
+
+def read_page(response: requests.Response) -> tuple[bytes, bool]:
+    """
+    Read a streamed response, stopping early once Shopify reports an available variant.
+    
+    Any "available":true means in stock, so the rest of the page is not needed.
+    It is still drained when it is small, since stopping mid-body closes the
+    connection rather than returning it to the session's pool.
+    
+    Returns:
+        Tuple of (body_read_up_to_match, found_available)
+    """
+    buf = bytearray()
+    found_available = False
+    drained = 0
+    for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+        if found_available:
+            drained += len(chunk)
+            if drained > STREAM_DRAIN_LIMIT:
+                break
+            continue
+        # Rescan a little of the previous chunk in case a match straddles the boundary
+        start = max(0, len(buf) - 64)
+        buf += chunk
+        if _RE_AVAILABLE_TRUE.search(buf, start):
+            found_available = True
+    return (bytes(buf), found_available)
+
+
+def check_stock(product: Product) -> bool | None:
     """
     Check stock status for a single product.
     
     Args:
-        product: Product dict with 'name', 'url', and optional 'out_of_stock_keywords'
+        product: Product to check; its cached HTTP state is updated in place
     
     Returns:
-        True if product is in stock, False otherwise
+        True if product is in stock, False if not, None if the check failed
     """
-    name = product.get("name", "Unknown Product")
-    url = product.get("url")
-    keywords = product.get("out_of_stock_keywords", DEFAULT_OUT_OF_STOCK_KEYWORDS)
+    name = product.name
+    url = product.url
     
     if not url:
         logger.error(f"No URL configured for product: {name}")
-        return False
+        return None
     
     try:
         logger.info(f"Checking: {name}")
-        response = requests.get(url, headers=HEADERS, timeout=15)
-        response.raise_for_status()
+        # Conditional GET: unchanged pages come back as an empty 304
+        conditional_headers = {}
+        if product.etag:
+            conditional_headers["If-None-Match"] = product.etag
+        if product.last_modified:
+            conditional_headers["If-Modified-Since"] = product.last_modified
+        with SESSION.get(url, headers=conditional_headers, timeout=15, stream=True) as response:
+            response.raise_for_status()
+
+            if response.status_code == 304:
+                logger.debug(f"{name} not modified, reusing last result")
+                in_stock = product.last_result
+            else:
+                html, found_available = read_page(response)
+                if found_available:
+                    in_stock = True
+                else:
+                    # Servers without validators still often return identical bodies
+                    body_hash = hashlib.blake2b(html, digest_size=16).digest()
+                    if body_hash == product.body_hash:
+                        logger.debug(f"{name} page unchanged, reusing last result")
+                        in_stock = product.body_result
+                    else:
+                        in_stock = is_in_stock(html, product.oos_pattern)
+                        product.body_hash = body_hash
+                        product.body_result = in_stock
+                product.etag = response.headers.get("ETag", "")
+                product.last_modified = response.headers.get("Last-Modified", "")
+                product.last_result = in_stock
 
-        if is_in_stock(response.content, keywords):
+        if in_stock:
             msg = f"✅ {name} is IN STOCK!\n🔗 {url}"
             send_telegram_message(msg)
             logger.info(f"✅ {name} is IN STOCK!")
             return True
         else:
             logger.info(f"❌ {name} - Not in stock")
+            return False
     except Exception as e:
         logger.error(f"Error checking {name}: {e}")
-    return False
+    return None
 
 
-def check_all_products() -> dict:
+def check_all_products() -> list:
     """
     Check stock status for all configured products.
     
     Returns:
-        Dict with product names as keys and stock status (bool) as values
+        Stock status of each product (bool, or None on error), in the same order as get_products()
     """
     products = get_products()
     if not products:
-        return {}
-    
-    results = {}
-    for product in products:
-        name = product.get("name", "Unknown")
-        results[name] = check_stock(product)
+        return []
     
-    return results
+    # Fetches are network-bound, so run them concurrently over the shared session
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(products))) as executor:
+        return list(executor.map(check_stock, products))
 
 
 # IST timezone (UTC+5:30)
@@ -260,9 +510,12 @@ def should_send_daily_report(last_report_date: str) -> bool:
     return False
 
 
-def send_daily_report():
+def send_daily_report(statuses: list):
     """
     Send a daily summary of all monitored products to Telegram.
+    
+    Args:
+        statuses: Stock statuses from the latest check_all_products() run, in product order
     """
     products = get_products()
     if not products:
@@ -277,23 +530,15 @@ def send_daily_report():
     report += f"{'─' * 25}\n\n"
     report += f"📋 Monitoring {len(products)} product(s):\n\n"
     
-    for i, product in enumerate(products, 1):
-        name = product.get("name", "Unknown")
-        url = product.get("url", "")
+    for i, (product, in_stock) in enumerate(zip(products, statuses), 1):
+        name = product.name
+        url = product.url
         
-        # Check current stock status
-        try:
-            response = requests.get(url, headers=HEADERS, timeout=15)
-            html_str = response.content.decode('utf-8', errors='ignore')
-            is_shopify, is_available = check_shopify_json_availability(html_str)
-            
-            if is_shopify:
-                status = "✅ In Stock" if is_available else "❌ Out of Stock"
-            else:
-                # Fallback for non-Shopify sites
-                status = "❓ Unknown"
-        except Exception:
+        # Reuse this cycle's check results instead of fetching every page again
+        if in_stock is None:
             status = "⚠️ Error checking"
+        else:
+            status = "✅ In Stock" if in_stock else "❌ Out of Stock"
         
         report += f"{i}. {name}\n"
         report += f"   {status}\n"
@@ -314,7 +559,7 @@ if __name__ == "__main__":
     logger.info("=" * 50)
     logger.info(f"Monitoring {len(products)} product(s)")
     for p in products:
-        logger.info(f"  - {p.get('name', 'Unknown')}: {p.get('url', 'No URL')}")
+        logger.info(f"  - {p.name}: {p.url or 'No URL'}")
     logger.info(f"Check interval: {CHECK_INTERVAL} seconds")
     logger.info(f"Daily report: {DAILY_REPORT_HOUR}:00 IST")
     logger.info(f"Telegram: {'Configured' if TOKEN and CHAT_ID else 'Not configured'}")
@@ -323,19 +568,29 @@ if __name__ == "__main__":
     # Track last daily report date to avoid duplicates
     last_report_date = ""
     check_count = 0
+    # Schedule checks on fixed monotonic deadlines so work time doesn't add drift
+    deadline = time.monotonic()
     
     while True:
         now = get_current_ist_time()
         check_count += 1
         logger.info(f"[Check #{check_count}] Starting at {now.strftime('%Y-%m-%d %H:%M:%S')} IST")
         
+        # Check all products for stock
+        statuses = check_all_products()
+        
         # Check if daily report should be sent
         if should_send_daily_report(last_report_date):
-            send_daily_report()
-            last_report_date = now.strftime("%Y-%m-%d")
+            send_daily_report(statuses)
+            # Checks may run past midnight, so date the report by when it was sent
+            last_report_date = get_current_ist_time().strftime("%Y-%m-%d")
         
-        # Check all products for stock
-        check_all_products()
-        logger.info(f"[Check #{check_count}] Complete. Next check in {CHECK_INTERVAL} seconds")
-        time.sleep(CHECK_INTERVAL)
+        deadline += CHECK_INTERVAL
+        sleep_seconds = deadline - time.monotonic()
+        if sleep_seconds <= 0:
+            # Check overran the interval, start the next one now and reset the schedule
+            sleep_seconds = 0
+            deadline = time.monotonic()
+        logger.info(f"[Check #{check_count}] Complete. Next check in {sleep_seconds:.0f} seconds")
+        time.sleep(sleep_seconds)
 
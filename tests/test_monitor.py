@@ -0,0 +1,156 @@
+import socket
+import time
+import unittest
+from unittest import mock
+
+from bs4 import BeautifulSoup
+
+import monitor
+
+
+class FakeResponse:
+    def __init__(self, body: bytes, status_code: int = 200, headers: dict = None):
+        self.body = body
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.bytes_read = 0
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            chunk = self.body[i:i + chunk_size]
+            self.bytes_read += len(chunk)
+            yield chunk
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+OUT_OF_STOCK_PAGE = b"<html><body><p>Sold Out</p></body></html>"
+SHOPIFY_IN_STOCK_PAGE = b'<script>{"variants":[{"available":true}]}</script>'
+
+
+class MakeProductTest(unittest.TestCase):
+    def test_null_keywords_fall_back_to_defaults(self):
+        product = monitor.make_product({"name": "x", "url": "https://a", "out_of_stock_keywords": None})
+        self.assertIs(product.oos_pattern, monitor.get_keyword_pattern(tuple(monitor.DEFAULT_OUT_OF_STOCK_KEYWORDS)))
+
+    def test_empty_keywords_disable_keyword_check(self):
+        product = monitor.make_product({"name": "x", "url": "https://a", "out_of_stock_keywords": []})
+        self.assertIsNone(product.oos_pattern)
+
+
+class ExtractTextTest(unittest.TestCase):
+    def assertMatchesSoupText(self, html: bytes):
+        expected = " ".join(BeautifulSoup(html, "lxml").get_text(" ", strip=True).split())
+        self.assertEqual(monitor.extract_text(html), expected)
+
+    def test_matches_soup_text(self):
+        self.assertMatchesSoupText(
+            b'<!DOCTYPE html><html><head><style>p{}</style><script>var s = "Sold Out"</script></head>'
+            b'<body><!-- Sold Out --><p>Coming&nbsp;Soon &amp; <b>more</b></p></body></html>'
+        )
+
+    def test_stray_less_than_is_text(self):
+        self.assertMatchesSoupText(b'<p>Ships in <2 days. Sold Out</p><button>Add to cart</button>')
+
+    def test_greater_than_in_quoted_attribute(self):
+        self.assertMatchesSoupText(
+            b"""<div x-data="{ label: qty > 0 ? 'Add to cart' : 'Sold Out' }"><button>Add to cart</button></div>"""
+        )
+
+    def test_unclosed_comment_and_script(self):
+        self.assertMatchesSoupText(b'<p>Sold Out</p><!-- unclosed <p>In stock</p>')
+        self.assertMatchesSoupText(b'<p>In stock</p><script>var a = "<p>Sold Out</p>";')
+
+    def test_many_unclosed_openers_are_fast(self):
+        for html in (b"<!--" * 20000, b"<script " * 20000, b"<a " * 50000 + b'"'):
+            start = time.perf_counter()
+            self.assertMatchesSoupText(html)
+            self.assertLess(time.perf_counter() - start, 2)
+
+
+class ReadPageTest(unittest.TestCase):
+    def test_small_remainder_is_drained(self):
+        response = FakeResponse(SHOPIFY_IN_STOCK_PAGE + b" " * monitor.STREAM_CHUNK_SIZE * 2)
+        self.assertTrue(monitor.read_page(response)[1])
+        self.assertEqual(response.bytes_read, len(response.body))
+
+    def test_large_remainder_is_abandoned(self):
+        response = FakeResponse(SHOPIFY_IN_STOCK_PAGE + b" " * monitor.STREAM_DRAIN_LIMIT * 4)
+        self.assertTrue(monitor.read_page(response)[1])
+        self.assertLess(response.bytes_read, len(response.body))
+
+
+class CachedDNSConnectionTest(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(monitor._DNS_CACHE.clear)
+
+    def test_connects_to_cached_address(self):
+        with socket.socket() as server:
+            server.bind(("127.0.0.1", 0))
+            server.listen()
+            port = server.getsockname()[1]
+            monitor._DNS_CACHE[("cached.invalid", port)] = (time.monotonic(), ["127.0.0.1"])
+            conn = monitor.CachedDNSHTTPConnection("cached.invalid", port, timeout=2)
+            conn.connect()
+            self.assertEqual(conn.host, "cached.invalid")
+            conn.close()
+
+    def test_failed_connect_drops_cache_entry(self):
+        with socket.socket() as unused:
+            unused.bind(("127.0.0.1", 0))
+            port = unused.getsockname()[1]
+        monitor._DNS_CACHE[("cached.invalid", port)] = (time.monotonic(), ["127.0.0.1"])
+        conn = monitor.CachedDNSHTTPConnection("cached.invalid", port, timeout=2)
+        with self.assertRaises(monitor.NewConnectionError):
+            conn.connect()
+        self.assertNotIn(("cached.invalid", port), monitor._DNS_CACHE)
+
+
+class CheckStockTest(unittest.TestCase):
+    def setUp(self):
+        self.product = monitor.make_product({"name": "Test", "url": "https://example.com/p"})
+        patcher = mock.patch.object(monitor, "send_telegram_message")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def check(self, response: FakeResponse):
+        with mock.patch.object(monitor.SESSION, "get", return_value=response):
+            return monitor.check_stock(self.product)
+
+    def test_unchanged_body_reuses_its_own_verdict(self):
+        # A -> B -> A: the early-abort result for B must not leak into A's cached hash
+        self.assertFalse(self.check(FakeResponse(OUT_OF_STOCK_PAGE)))
+        self.assertTrue(self.check(FakeResponse(SHOPIFY_IN_STOCK_PAGE)))
+        self.assertFalse(self.check(FakeResponse(OUT_OF_STOCK_PAGE)))
+
+    def test_not_modified_reuses_last_result(self):
+        responses = [
+            FakeResponse(SHOPIFY_IN_STOCK_PAGE, headers={"ETag": '"v1"'}),
+            FakeResponse(b"", status_code=304),
+        ]
+        with mock.patch.object(monitor.SESSION, "get", side_effect=responses) as get:
+            self.assertTrue(monitor.check_stock(self.product))
+            self.assertTrue(monitor.check_stock(self.product))
+        self.assertEqual(get.call_args_list[1].kwargs["headers"], {"If-None-Match": '"v1"'})
+
+
+class DailyReportTest(unittest.TestCase):
+    def test_products_with_same_name_keep_their_own_status(self):
+        products = [monitor.make_product({"url": "https://a"}), monitor.make_product({"url": "https://b"})]
+        with mock.patch.object(monitor, "get_products", return_value=products), \
+                mock.patch.object(monitor, "send_telegram_message") as send:
+            monitor.send_daily_report([True, False])
+        report = send.call_args[0][0]
+        self.assertIn("1. Unknown\n   ✅ In Stock", report)
+        self.assertIn("2. Unknown\n   ❌ Out of Stock", report)
+
+
+if __name__ == "__main__":
+    unittest.main()